@@ -1,9 +1,26 @@
 # api/__init__.py
 import os
+import sys
 import importlib
+import functools
 
 _api_registry = {}
-_apis_discovered = False # Added a discovery flag
+
+# Known API types and the module that registers each one. Only the module
+# for the requested type is imported, so unused provider SDKs are never loaded.
+_LAZY_APIS = {
+    "openai": "api.openai_api",
+    "google": "api.google_api",
+    "google_flash": "api.google_api",
+}
+
+# Class names exposed as attributes of this package (e.g. `api.OpenAIAPI`),
+# mapped to the API type that registers them.
+_LAZY_CLASSES = {
+    "OpenAIAPI": "openai",
+    "GoogleAPI": "google",
+    "GoogleFlashAPI": "google_flash",
+}
 
 
 def register_api(name):
@@ -15,27 +32,42 @@ def register_api(name):
         return cls
     return decorator
 
+@functools.cache
 def _discover_apis(api_dir):
     """
     Discovers and imports all available API classes in the specified directory.
+    Only used as a fallback for API types missing from _LAZY_APIS; the result
+    is cached per directory so the scan runs at most once.
 
     Args:
         api_dir (str): The directory containing the API implementations.
     """
-    global _apis_discovered
-    if _apis_discovered: # Prevent duplicated runs
-      return
     for filename in os.listdir(api_dir):
         if filename.endswith('.py') and filename != '__init__.py' and filename != "api.py":
             module_name = filename[:-3] # remove .py
             module_path = f"api.{module_name}"
+            if module_path in sys.modules: # Already imported and registered
+              continue
             try:
               importlib.import_module(module_path)
             except ModuleNotFoundError as e:
               print(f"Warning: Could not import {module_path}. Error: {e}")
-    _apis_discovered = True
 
 
+def __getattr__(name):
+    """
+    Lazily resolves API classes listed in _LAZY_CLASSES on first attribute access.
+    The class is written back into the module globals, so later lookups are plain
+    attribute hits and never reach this function again.
+    """
+    api_type = _LAZY_CLASSES.get(name)
+    if api_type is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    importlib.import_module(_LAZY_APIS[api_type])
+    cls = _api_registry[api_type]
+    globals()[name] = cls
+    return cls
+
 
 def create_api_instance(api_type, api_key=None, api_dir=None):
     """
@@ -52,10 +84,16 @@ def create_api_instance(api_type, api_key=None, api_dir=None):
     Raises:
         ValueError: If the API type is invalid.
     """
-    if not api_dir:
-       api_dir = os.path.join(os.path.dirname(__file__))
-    _discover_apis(api_dir)
+    if api_type not in _api_registry:
+        module_path = _LAZY_APIS.get(api_type)
+        if module_path:
+            if module_path not in sys.modules:
+                importlib.import_module(module_path)
+        else:
+            if not api_dir:
+               api_dir = os.path.join(os.path.dirname(__file__))
+            _discover_apis(api_dir)
     api_class = _api_registry.get(api_type)
     if not api_class:
         raise ValueError(f"Invalid API type: {api_type}")
-    return api_class(api_key=api_key)
\ No newline at end of file
+    return api_class(api_key=api_key)
@@ -83,3 +83,19 @@ class API(ABC):
             str: The generated text.
         """
         pass
+
+    async def process_text_stream(self, prompt, **kwargs):
+        """
+        Generates text from a given prompt, yielding it in chunks as it arrives.
+        APIs without streaming support yield the full response as a single chunk.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            **kwargs: Additional keyword arguments for the API call.
+
+        Yields:
+            str: Successive pieces of the generated text.
+        """
+        response = await self.process_text(prompt, **kwargs)
+        if response:
+            yield response
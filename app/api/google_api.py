@@ -1,10 +1,6 @@
 # api/google_api.py
 from api.api import API
 from api import register_api
-from google import genai
-from google.genai import types
-import pathlib
-import PIL.Image
 
 @register_api("google")
 class GoogleAPI(API):
@@ -27,6 +23,8 @@ class GoogleAPI(API):
                 "No valid GoogleAI API key found. Provide it as a string, file path, "
                 "or set GOOGLEAI_API_KEY in the environment."
             )
+        # Deferred so that importing this module does not pull in the SDK
+        from google import genai
         self.client = genai.Client(api_key = self.api_key)
 
     def set_model(self, model_name):
@@ -48,13 +46,35 @@ class GoogleAPI(API):
              NotImplementedError: This method is not yet implemented for Google API.
         """
         try:
-            response = self.client.models.generate_content(model=self.MODEL_NAME, contents=prompt)
+            response = await self.client.aio.models.generate_content(model=self.MODEL_NAME, contents=prompt)
             return response.text
         except Exception as e:
             print(f"Error generating text with Google API: {e}")
             raise
 
+    async def process_text_stream(self, prompt, timeout=10, **kwargs):
+        """
+        Generates text using the Google API, yielding chunks as they are produced.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            timeout (int): Timeout in seconds for the API call.
+            **kwargs: Additional keyword arguments for the API call.
+
+        Yields:
+            str: Successive pieces of the generated text.
+        """
+        try:
+            stream = await self.client.aio.models.generate_content_stream(model=self.MODEL_NAME, contents=prompt)
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            print(f"Error generating text with Google API: {e}")
+            raise
+
     async def process_image(self, prompt, image, timeout=10, **kwargs):
+        import PIL.Image
         try:
             if isinstance(image, PIL.Image.Image):
                 image = image
@@ -83,16 +103,27 @@ class GoogleAPI(API):
             raise
 
     def list_models(self):
+        from google import genai
         print("List of models that support generateContent:\n")
         for m in genai.list_models():
             if "generateContent" in m.supported_generation_methods:
                 print(m.name)
 
     def get_model_info(self, model: str):
+        from google import genai
         model_info = genai.get_model(model)
         print(model_info)
 
 
+@register_api("google_flash")
+class GoogleFlashAPI(GoogleAPI):
+    """
+    Google API bound to a smaller, cheaper model for short prompts.
+    """
+
+    MODEL_NAME = "models/gemini-2.0-flash"
+
+
 if __name__ == "__main__":
     api = GoogleAPI()
     api.list_models()
@@ -1,8 +1,8 @@
 # api/openai_api.py
 import asyncio
+import json
 from api.api import API
 from api import register_api
-from openai import OpenAI
 
 
 @register_api("openai")
@@ -19,7 +19,17 @@ class OpenAIAPI(API):
                         a path to a file containing the API key.
         """
         super().__init__(api_key, api_env="OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key)
+        # Deferred so that importing this module does not pull in the SDK
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        import httpx
+        # One pooled HTTP client for the lifetime of the instance, so every call
+        # made from the same event loop reuses open TCP/TLS connections.
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            ),
+        )
         # If we don’t have a key or a client, raise an error.
         if not self.api_key or not self.client:
             raise ValueError(
@@ -27,6 +37,20 @@ class OpenAIAPI(API):
                 "or set OPENAI_API_KEY in the environment."
             )
 
+    @staticmethod
+    def _build_messages(prompt):
+        """
+        Converts a plain string prompt into a "system" message.
+        If `prompt` is a list, assume it's already in the correct chat format.
+        """
+        if isinstance(prompt, str):
+            return [{"role": "system", "content": prompt}]
+        if not isinstance(prompt, list):
+            raise TypeError(
+                "Prompt must be either a string or a list of messages (JSON)."
+            )
+        return prompt
+
     async def process_text(
         self,
         prompt,
@@ -48,21 +72,12 @@ class OpenAIAPI(API):
             **kwargs: Additional keyword arguments for the API call.
 
         Returns:
-            str: The generated text, or None if an error occurred.
+            str: The generated text.
         """
-        # Convert a plain string prompt into a "system" message.
-        # If `prompt` is a list, assume it's already in the correct chat format.
-        if isinstance(prompt, str):
-            messages = [{"role": "system", "content": prompt}]
-        else:
-            if not isinstance(prompt, list):
-                raise TypeError(
-                    "Prompt must be either a string or a list of messages (JSON)."
-                )
-            messages = prompt
+        messages = self._build_messages(prompt)
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=model,
                 messages=messages,
                 stream=False,
@@ -74,7 +89,121 @@ class OpenAIAPI(API):
             return generated_text
         except Exception as e:
             print(f"An error occurred while generating text: {e}")
-            return None
+            raise
+
+    async def process_text_stream(
+        self,
+        prompt,
+        model="chatgpt-4o-latest",
+        max_tokens=8192,
+        temperature=1.0,
+        timeout=10,
+        **kwargs,
+    ):
+        """
+        Generates text using the OpenAI API, yielding chunks as they are produced.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            model (str): The OpenAI model to use.
+            max_tokens (int): The maximum number of tokens for the generated text.
+            temperature (float): The sampling temperature.
+            timeout (int): Timeout in seconds for the API call.
+            **kwargs: Additional keyword arguments for the API call.
+
+        Yields:
+            str: Successive pieces of the generated text.
+        """
+        messages = self._build_messages(prompt)
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            print(f"An error occurred while generating text: {e}")
+            raise
+
+    async def process_text_batch(
+        self,
+        prompts,
+        model="gpt-4o",
+        max_tokens=8192,
+        temperature=1.0,
+        poll_interval=30,
+        max_poll_interval=600,
+    ):
+        """
+        Generates text for many prompts through the OpenAI Batch API, which is
+        billed at half the online price but may take up to 24h to complete.
+
+        Args:
+            prompts (dict): Mapping of a unique custom id to its prompt (string or
+                            list of chat messages).
+            model (str): The OpenAI model to use.
+            max_tokens (int): The maximum number of tokens for each generated text.
+            temperature (float): The sampling temperature.
+            poll_interval (int): Initial delay in seconds between status checks.
+            max_poll_interval (int): Upper bound for the exponential poll backoff.
+
+        Returns:
+            dict: Mapping of custom id to the generated text, or None for requests
+                  that failed. Empty if the batch itself failed.
+        """
+        lines = []
+        for custom_id, prompt in prompts.items():
+            messages = self._build_messages(prompt)
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": messages,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                },
+            }))
+
+        try:
+            batch_file = await self.client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+            )
+
+            delay = poll_interval
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_poll_interval)
+                batch = await self.client.batches.retrieve(batch.id)
+
+            if batch.status != "completed" or not batch.output_file_id:
+                print(f"Batch {batch.id} finished with status: {batch.status}")
+                return {}
+
+            results = dict.fromkeys(prompts)
+            output = (await self.client.files.content(batch.output_file_id)).text
+            for line in output.splitlines():
+                record = json.loads(line)
+                response = record.get("response")
+                if response and response.get("status_code") == 200:
+                    results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            return results
+        except Exception as e:
+            print(f"An error occurred while processing the batch: {e}")
+            return {}
 
     async def embed_text(self, text):
         if len(text)//3 > 8192:
@@ -83,7 +212,7 @@ class OpenAIAPI(API):
             )
         try:
             text = text.replace("\n", " ")
-            response = self.client.embeddings.create(
+            response = await self.client.embeddings.create(
                 input=text, model="text-embedding-3-small"
             )
             return response.data[0].embedding
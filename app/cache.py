@@ -0,0 +1,153 @@
+# cache.py
+"""
+Content-addressed cache for LLM responses.
+
+Responses are stored under a hash of the full prompt text, so a cached entry is
+only reused when the exact same prompt (instructions, date and payload) is sent
+again. Any change to the scraped data or to a prompt template produces a new
+entry instead of silently returning a stale response.
+"""
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+
+import zstandard
+
+LLM_CACHE_DIR = os.path.join("cache", "llm")
+INDEX_FILENAME = os.path.join(LLM_CACHE_DIR, "index.jsonl")
+# Cache entries are zstd compressed; level 3 is fast and shrinks news text 3-5x
+COMPRESSION_LEVEL = 3
+os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+
+# LLM calls in progress, keyed by prompt hash
+_inflight = {}
+
+# Process umask, read once: os.umask can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _write_atomic(path: str, data: bytes):
+    # Write to a temporary file in the same directory, then rename over the target
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+            # mkstemp creates the file as 0600; use the mode open() would give it
+            if hasattr(os, "fchmod"):
+                os.fchmod(tmp_file.fileno(), 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_text(path: str, text: str):
+    """
+    Writes `text` to `path` atomically, so readers never see a partial file.
+    Blocking; run it through asyncio.to_thread from coroutines.
+    """
+    _write_atomic(path, text.encode("utf-8"))
+
+
+def read_compressed(path: str) -> str:
+    """
+    Reads a zstd compressed UTF-8 text file, decompressing straight from a
+    memory map of the file. Blocking; run it through asyncio.to_thread from coroutines.
+    """
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+
+
+def write_compressed(path: str, text: str):
+    """
+    Writes `text` zstd compressed to `path` atomically.
+    Blocking; run it through asyncio.to_thread from coroutines.
+    """
+    compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+    _write_atomic(path, compressor.compress(text.encode("utf-8")))
+
+
+def _append_index(key: str, digest: str):
+    with open(INDEX_FILENAME, "a", encoding="utf-8") as index_file:
+        index_file.write(json.dumps({"key": key, "hash": digest}) + "\n")
+
+
+def prompt_hash(prompt: str) -> str:
+    """
+    Returns the hex digest used as the cache key for `prompt`.
+    """
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_filename(digest: str) -> str:
+    return os.path.join(LLM_CACHE_DIR, f"{digest}.zst")
+
+
+async def lookup(prompt: str):
+    """
+    Returns the cached response for `prompt`, or None if it was never answered.
+    """
+    cache_filename = _cache_filename(prompt_hash(prompt))
+    if os.path.isfile(cache_filename):
+        return await asyncio.to_thread(read_compressed, cache_filename)
+    return None
+
+
+async def store(prompt: str, response: str, key: str = None):
+    """
+    Caches `response` as the answer to `prompt`. Empty responses are not cached.
+
+    Args:
+        prompt (str): The full prompt text sent to the LLM.
+        response (str): The LLM response.
+        key (str, optional): Human readable label (e.g. the keyword) recorded in the
+                             index file for debugging.
+    """
+    if not response:
+        return
+    digest = prompt_hash(prompt)
+    await asyncio.to_thread(write_compressed, _cache_filename(digest), response)
+    if key:
+        await asyncio.to_thread(_append_index, key, digest)
+
+
+async def _call_and_store(prompt: str, fn, key: str) -> str:
+    response = await fn(prompt)
+    await store(prompt, response, key)
+    return response
+
+
+async def get_or_call(prompt: str, fn, key: str = None) -> str:
+    """
+    Returns the cached response for `prompt`, or awaits `fn(prompt)` and caches it.
+    Concurrent calls with the same prompt share a single `fn` call.
+
+    Args:
+        prompt (str): The full prompt text sent to the LLM.
+        fn (callable): Coroutine function taking the prompt and returning the response.
+        key (str, optional): Human readable label (e.g. the keyword) recorded in the
+                             index file for debugging.
+
+    Returns:
+        str: The LLM response. Empty or None responses are returned but not cached.
+    """
+    cached_response = await lookup(prompt)
+    if cached_response is not None:
+        return cached_response
+
+    digest = prompt_hash(prompt)
+    task = _inflight.get(digest)
+    if task is None:
+        task = asyncio.ensure_future(_call_and_store(prompt, fn, key))
+        _inflight[digest] = task
+        task.add_done_callback(lambda _: _inflight.pop(digest, None))
+    # Shielded so that one caller being cancelled does not cancel the call for the others
+    return await asyncio.shield(task)
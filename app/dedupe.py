@@ -0,0 +1,98 @@
+# dedupe.py
+"""
+Near-duplicate paragraph removal for LLM summaries.
+
+Keyword summaries often repeat the same news paragraphs. Each paragraph is
+fingerprinted with a 64-bit SimHash; a paragraph is dropped when an earlier one
+lies within MAX_HAMMING_DISTANCE bits of it and states the same numbers and
+months. Short paragraphs (section headings, one-line bullets) are always kept,
+so every summary keeps its own structure.
+"""
+import hashlib
+import re
+from typing import Iterable, List
+
+MAX_HAMMING_DISTANCE = 3
+# Paragraphs with fewer word tokens than this are never dropped
+MIN_DEDUPE_TOKENS = 12
+
+# A 64-bit hash split into (MAX_HAMMING_DISTANCE + 1) bands: two hashes within
+# the distance must agree exactly on at least one band, so only paragraphs
+# sharing a band are compared.
+_BANDS = MAX_HAMMING_DISTANCE + 1
+_BAND_BITS = 64 // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_TOKEN = re.compile(r"\w+")
+_MONTHS = {
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+
+
+def simhash(tokens: Iterable[str]) -> int:
+    """
+    Returns the 64-bit SimHash of the given word tokens.
+    """
+    weights = [0] * 64
+    for token in tokens:
+        token_hash = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if token_hash >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _facts(tokens: List[str]) -> tuple:
+    # Numbers and month names: paragraphs that differ in these (e.g. two
+    # meetings on different dates) report different events
+    return tuple(token for token in tokens if token in _MONTHS or any(char.isdigit() for char in token))
+
+
+def dedupe_paragraphs(texts: Iterable[str]) -> List[str]:
+    """
+    Splits each text into paragraphs and drops paragraphs that repeat an
+    earlier one (in the same or a previous text), preserving order.
+
+    Args:
+        texts (Iterable[str]): The documents to merge (e.g. keyword summaries).
+
+    Returns:
+        List[str]: One entry per input text that has any paragraphs left, with
+                   those paragraphs separated by blank lines. Texts whose
+                   paragraphs were all duplicates are omitted.
+    """
+    deduped = []
+    buckets = [{} for _ in range(_BANDS)]
+    for text in texts:
+        if not text:
+            continue
+        kept = []
+        for paragraph in text.split("\n\n"):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            tokens = _TOKEN.findall(paragraph.lower())
+            if len(tokens) < MIN_DEDUPE_TOKENS:
+                kept.append(paragraph)
+                continue
+            fingerprint = simhash(tokens)
+            facts = _facts(tokens)
+            bands = [(fingerprint >> (i * _BAND_BITS)) & _BAND_MASK for i in range(_BANDS)]
+            is_duplicate = any(
+                other_facts == facts and bin(fingerprint ^ other).count("1") <= MAX_HAMMING_DISTANCE
+                for i, band in enumerate(bands)
+                for other, other_facts in buckets[i].get(band, ())
+            )
+            if is_duplicate:
+                continue
+            kept.append(paragraph)
+            for i, band in enumerate(bands):
+                buckets[i].setdefault(band, []).append((fingerprint, facts))
+        if kept:
+            deduped.append("\n\n".join(kept))
+    return deduped
@@ -9,13 +9,13 @@ This script provides two main functionalities:
 
 The portfolio keywords are constructed by combining each stock's security name 
 with its corresponding earnings quarter and year. For BDR stocks (identified by 
-"34" in their ticker), the quarter is adjusted forward by two quarters; for other 
+a ticker ending in "34"), the quarter is adjusted forward by two quarters; for other 
 stocks, the quarter is adjusted backward by one quarter.
 """
 
 import json
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 # -----------------------------------------------------------------------------
 # Pre-defined Keywords for Market Events
@@ -96,12 +96,28 @@ def get_current_quarter_details() -> Dict[str, int]:
     return {"quarter": calendar_quarter, "year": current_year}
 
 
+def roll_quarter(quarter: int, year: int) -> Tuple[int, int]:
+    """
+    Normalizes a quarter that may have been shifted past Q4 or before Q1,
+    carrying the overflow into the year.
+
+    Args:
+        quarter (int): The (possibly out-of-range) quarter number.
+        year (int): The year the quarter offset is relative to.
+
+    Returns:
+        Tuple[int, int]: The normalized (quarter, year) pair.
+    """
+    year_offset, quarter_index = divmod(quarter - 1, 4)
+    return quarter_index + 1, year + year_offset
+
+
 def extract_portfolio_keywords() -> List[str]:
     """
     Extracts portfolio keywords by combining each stock's security name with its 
     respective earnings quarter and year. The quarter is adjusted as follows:
     
-    - For BDR stocks (ticker contains "34"): add 2 quarters.
+    - For BDR stocks (ticker ends with "34"): add 2 quarters.
     - For non-BDR stocks: subtract 1 quarter (since the current quarter has not passed yet).
     
     Year adjustments are applied when quarter calculations roll over past Q4 or before Q1.
@@ -114,39 +130,22 @@ def extract_portfolio_keywords() -> List[str]:
         current_quarter = quarter_info["quarter"]
         current_year = quarter_info["year"]
 
-        ticker_list: List[str] = []
         portfolio = load_user_portfolio()
 
         if not portfolio:
-            return ticker_list  # Return empty list if portfolio is empty
-
-        for stock in portfolio:
-            security = stock.get("security")
-            ticker = stock.get("ticker")
-            if not security or not ticker:
-                continue  # Skip stocks with missing data
-
-            is_bdr = "34" in ticker.lower()
-            quarter = current_quarter
-            year = current_year
-
-            if is_bdr:
-                # Add 2 quarters for BDR stocks
-                quarter += 2
-                if quarter > 4:
-                    quarter -= 4
-                    year += 1
-            else:
-                # Subtract 1 quarter for non-BDR stocks
-                quarter -= 1
-                if quarter < 1:
-                    quarter = 4
-                    year -= 1
-
-            ticker_entry = f"{security} earnings Q{quarter} FY{year}"
-            ticker_list.append(ticker_entry)
-
-        return ticker_list
+            return []  # Return empty list if portfolio is empty
+
+        # Only two outcomes are possible, so build both suffixes once up front
+        bdr_quarter, bdr_year = roll_quarter(current_quarter + 2, current_year)
+        other_quarter, other_year = roll_quarter(current_quarter - 1, current_year)
+        bdr_suffix = f" earnings Q{bdr_quarter} FY{bdr_year}"
+        other_suffix = f" earnings Q{other_quarter} FY{other_year}"
+
+        return [
+            stock["security"] + (bdr_suffix if stock["ticker"].endswith("34") else other_suffix)
+            for stock in portfolio
+            if stock.get("security") and stock.get("ticker")  # Skip stocks with missing data
+        ]
 
     except Exception as e:
         print(f"Error in extract_portfolio_keywords: {str(e)}")
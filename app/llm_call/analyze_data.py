@@ -1,9 +1,8 @@
 from datetime import date
+from functools import lru_cache
 
-def analyze_data():
-    prompt = f"""
+_ANALYZE_TEMPLATE = """
 <context> 
-Today is {date.today()}.
 You are an expert market analyst.
 You are provided with data from multiple sources that include:
 - Recurring Market Events (for example, Nonfarm Payrolls, FOMC Meetings, Earnings Reports)
@@ -17,33 +16,12 @@ Produce a structured list of events, with dates and general overview, that will
 </objective>
 <instructions>
 1. Identify events and their types
-   Use the following categories for recurring market events:
-   - Regular Economic Data Releases
-   - Monthly Reports (for example, Nonfarm Payrolls, Unemployment Rate, CPI)
-   - Quarterly Reports (for example, GDP, Industrial Production)
-   - Weekly Data (for example, Initial Jobless Claims)
-   - Scheduled Monetary Policy Announcements
-   - Central Bank Meetings (for example, FOMC, ECB, BoJ, Bank of Canada)
-   - Press Conferences and Minutes Releases
-   - Recurring Corporate Events (specify the name of the company in the title)
-   - Earnings Seasons (Quarterly Earnings Reports)
-   - Other Corporate Announcements (Dividend Announcements, M&A, Product Launches)
-   - Calendar Anomalies and Technical Factors
-   - Day-of-the-Week or Turn-of-the-Month Effects
-   - Options Expiration and Portfolio Rebalancing Days
-   Also consider unpredicted news events based on the data provided (for example, geopolitical news, regulatory changes, major accidents).
+   Recurring market event categories: Regular Economic Data Releases; Monthly Reports (Nonfarm Payrolls, Unemployment Rate, CPI); Quarterly Reports (GDP, Industrial Production); Weekly Data (Initial Jobless Claims); Scheduled Monetary Policy Announcements; Central Bank Meetings (FOMC, ECB, BoJ, Bank of Canada); Press Conferences and Minutes Releases; Recurring Corporate Events (name the company in the title); Earnings Seasons; Other Corporate Announcements (Dividends, M&A, Product Launches); Calendar Anomalies and Technical Factors; Day-of-the-Week or Turn-of-the-Month Effects; Options Expiration and Portfolio Rebalancing Days.
+   Also consider unpredicted news events (for example, geopolitical news, regulatory changes, major accidents).
 
 2. Assign a relevance rating to stock market volatility
-   Use the following rating scale: Low, Moderate, High, Very High.
-   Consider both general market impact and potential impact on the user’s portfolio when assigning the rating.
-   Examples:
-   - Monthly Reports (Nonfarm Payrolls, CPI): Very High
-   - Quarterly Reports (GDP): High
-   - Weekly Reports (Initial Jobless Claims): Moderate
-   - Central Bank Meetings: Very High
-   - Earnings Seasons: High
-   - Technical Factors (Options Expiration): Moderate
-   - Minor Calendar Anomalies: Low
+   Scale: Low, Moderate, High, Very High. Consider both general market impact and impact on the user’s portfolio.
+   Reference: Monthly Reports and Central Bank Meetings = Very High; Quarterly Reports and Earnings Seasons = High; Weekly Reports and Options Expiration = Moderate; Minor Calendar Anomalies = Low.
 
 3. Specify event dates
    Include the specific date or date range for each event.
@@ -73,8 +51,43 @@ Do not use bold, italics or other irrelevant markdown formatting for LLMs.
 </output_format>
 <remember>
 Incorporate user portfolio context where relevant (for example, if the user holds a company about to release earnings, that event might have a higher relevance rating).
-Unpredicted news events should be noted with any available timing or date ranges and a rationale for why they are considered significant.
-Your final output should be limited to this concise, event-focused list.
 </remember>
+Today is {today}.
+"""
+
+@lru_cache(maxsize=1)
+def _render_analyze(today: date) -> str:
+    return _ANALYZE_TEMPLATE.format(today=today)
+
+def analyze_data():
+    return _render_analyze(date.today())
+
+_ANALYZE_REDUCE_TEMPLATE = """
+<context>
+You are an expert market analyst.
+The market data was too large for a single pass, so it was split into parts and each part was analyzed separately.
+You are provided with the partial event lists produced for each part.
+</context>
+<instructions>
+1. Merge the partial lists into a single list of events.
+2. When the same event appears in more than one list, keep one entry, combining their details and keeping the highest relevance rating.
+3. Keep every event rated High or Very High, and lower rated events only when they relate to the user's portfolio.
+4. Order the events chronologically by date.
+</instructions>
+<output_format>
+Use the same format as the partial lists. Each entry should include:
+- Event Type
+- Relevance Rating
+- Event Date(s)
+- General overview and Summary
+Do not use bold, italics or other irrelevant markdown formatting for LLMs.
+</output_format>
+Today is {today}.
 """
-    return prompt
\ No newline at end of file
+
+@lru_cache(maxsize=1)
+def _render_analyze_reduce(today: date) -> str:
+    return _ANALYZE_REDUCE_TEMPLATE.format(today=today)
+
+def analyze_reduce():
+    return _render_analyze_reduce(date.today())
\ No newline at end of file
@@ -1,18 +1,8 @@
 from datetime import date
+from functools import lru_cache
 
-def combine_scrape_prompt(query):
-    """
-    Generates a prompt for synthesizing aggregated web pages into a comprehensive report.
-
-    Parameters:
-        query (str): The keyword or topic based on which the web pages were aggregated.
-
-    Returns:
-        str: A formatted prompt that instructs an LLM to synthesize the aggregated data.
-    """
-    prompt = f"""
-Today is {date.today()}.
-You are provided with a collection of aggregated web pages from various news sources containing information on {query}. Your task is to synthesize this content into one comprehensive and coherent report. Please follow these guidelines:
+_COMBINE_SCRAPE_TEMPLATE = """
+You are provided with a collection of aggregated web pages from various news sources containing information on the query given in the <query> tag below. Your task is to synthesize this content into one comprehensive and coherent report. Please follow these guidelines:
 
 1. Keep Track of Dates: Prioritize the most recent information and note dates where applicable to maintain relevance. If future dates are mentioned (e.g., upcoming events, deadlines, or scheduled announcements), identify these as future events and list them separately under a section like ‘Upcoming Events’ for easy reference.
 2. Preserve Details: Include every key fact or unique insight from the sources, ensuring no relevant information is omitted.
@@ -22,5 +12,22 @@ You are provided with a collection of aggregated web pages from various news sou
 6. Unbiased Tone: Present the information factually and objectively, without favoring one source over another.
 
 Using these instructions, please generate a report that accurately reflects the aggregated data.
+<query>{query}</query>
+Today is {today}.
 """
-    return prompt
\ No newline at end of file
+
+@lru_cache(maxsize=256)
+def _render_combine_scrape(today: date, query) -> str:
+    return _COMBINE_SCRAPE_TEMPLATE.format(today=today, query=query)
+
+def combine_scrape_prompt(query):
+    """
+    Generates a prompt for synthesizing aggregated web pages into a comprehensive report.
+
+    Parameters:
+        query (str): The keyword or topic based on which the web pages were aggregated.
+
+    Returns:
+        str: A formatted prompt that instructs an LLM to synthesize the aggregated data.
+    """
+    return _render_combine_scrape(date.today(), query)
\ No newline at end of file
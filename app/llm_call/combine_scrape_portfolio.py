@@ -1,14 +1,8 @@
-from datetime import datetime, date
+from datetime import date
+from functools import lru_cache
 
-def weekday():
-    current_date = datetime.now()
-    day_of_week = current_date.strftime('%A')
-    return day_of_week
-
-def combine_portfolio_prompt(stock):
-    prompt = f"""
-Today is {weekday()} {date.today()}.
-You are provided with a collection of aggregated web pages, including news articles, analyst reports, and financial updates, related to the following stock in the user's portfolio: {stock}. 
+_COMBINE_PORTFOLIO_TEMPLATE = """
+You are provided with a collection of aggregated web pages, including news articles, analyst reports, and financial updates, related to the stock in the user's portfolio given in the <stock> tag below. 
 Your task is to combine this content into one comprehensive and coherent report. Please follow these guidelines:
 1. Prioritize Recent Information: Focus on the most up-to-date information and clearly note the dates of key events or data points to maintain relevance. If future dates are mentioned (e.g., upcoming earnings reports, product launches, or regulatory deadlines), identify these as future events and list them separately under a section titled ‘Upcoming Events’ for easy reference.
 2. Include All Key Details: Ensure that every significant fact, statistic, or unique insight from the sources is included. For example, this could include stock price changes, earnings results, analyst ratings, or major company announcements. Do not omit any relevant information that could impact the user's understanding of the portfolio.
@@ -22,5 +16,13 @@ Your task is to combine this content into one comprehensive and coherent report.
 5. Integrate Information Thoughtfully: Merge similar points from different sources into a coherent narrative. If there are conflicting reports or discrepancies (e.g., differing analyst opinions or contradictory data), highlight these differences and, if possible, indicate which sources might be more reliable based on their reputation or recency.
 6. Maintain an Unbiased Tone: Present the information factually and objectively, without favoring one source over another. Avoid speculative language or personal opinions.
 Using these instructions, please generate a report that accurately reflects the aggregated data.
+<stock>{stock}</stock>
+Today is {weekday} {today}.
 """
-    return prompt
\ No newline at end of file
+
+@lru_cache(maxsize=256)
+def _render_combine_portfolio(today: date, stock) -> str:
+    return _COMBINE_PORTFOLIO_TEMPLATE.format(weekday=today.strftime('%A'), today=today, stock=stock)
+
+def combine_portfolio_prompt(stock):
+    return _render_combine_portfolio(date.today(), stock)
\ No newline at end of file
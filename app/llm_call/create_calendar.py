@@ -1,14 +1,8 @@
-from datetime import datetime, date
+from datetime import date
+from functools import lru_cache
 
-def weekday():
-    current_date = datetime.now()
-    day_of_week = current_date.strftime('%A')
-    return day_of_week
-
-def create_calendar():
-    prompt = f"""
+_CALENDAR_TEMPLATE = """
 <context> 
-Today is {weekday()}, {date.today()}.
 You have received a comprehensive list of events. Each event is structured with the following details:
 - Event Type (for example, Nonfarm Payrolls, Earnings Release, etc.)
 - Relevance Rating (Low, Moderate, High, Very High)
@@ -56,21 +50,9 @@ Your task is to generate and distribute three types of calendars based on this l
 3. Relevance: Highlight events particularly important to the user’s portfolio or with a high market impact.
 </output_requirements>
 <output_format>
-# Example Output Structure (for illustration)
-Monthly Calendar (March Edition)
+One line per event, for example:
 - March 3 - Nonfarm Payrolls (Very High): Key labor market indicator, likely to impact Fed policy.
-- March 8 - Company ABC Earnings (High): User holds ABC; potential price volatility.
-- and so on for the month.
-
-Weekly Calendar (Week of March 5 – 11)
-- Monday, March 6 - PMI Data (High)
-- Wednesday, March 8 - Company ABC Earnings (High)
-- Thursday, March 9 - Initial Jobless Claims (Moderate)
-- list of events for each day of the week.
-
-Daily Highlights (March 6)
-- PMI Data (High): Expectations versus last month’s reading.
-- Any unexpected overnight developments.
+- Wednesday, March 8 - Company ABC Earnings (High): User holds ABC; potential price volatility.
 </output_format>
 <remember>
 What You Should Not Include:
@@ -78,8 +60,15 @@ What You Should Not Include:
 - Redundant information: Focus on clarity and brevity.
 - Analysis beyond event descriptions: You may add brief context or significance, but do not include unrelated commentary.
 </remember>
+Today is {weekday}, {today}.
 """
-    return prompt
+
+@lru_cache(maxsize=1)
+def _render_calendar(today: date) -> str:
+    return _CALENDAR_TEMPLATE.format(weekday=today.strftime('%A'), today=today)
+
+def create_calendar():
+    return _render_calendar(date.today())
 
 if __name__ == "__main__":
     print(create_calendar())
\ No newline at end of file
@@ -1,109 +1,436 @@
 # main.py
 import os
+import time
 import asyncio
-import glob
+import httpx
+import openai
+import orjson
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 from datetime import datetime, date
+from queue import Empty, SimpleQueue
 from keywords import get_keywords
 from scrape_api import call_scrape_api
 from llm_call.combine_scrape_general import combine_scrape_prompt
-from llm_call.analyze_data import analyze_data
+from llm_call.analyze_data import analyze_data, analyze_reduce
 from llm_call.create_calendar import create_calendar
 
 from api import create_api_instance
+from cache import get_or_call, lookup, read_compressed, store, write_compressed, write_text
+from dedupe import dedupe_paragraphs
+from tokens import chunk_by_tokens, count_prompt_tokens
 
 openai_llm_api = create_api_instance("openai")  # For better processing
 google_llm_api = create_api_instance("google")  # For 2M tokens context size
+google_flash_api = create_api_instance("google_flash")  # Cheaper, for prompts that fit a small context
 
 # Define the cache directory and ensure it exists
 CACHE_DIR = "cache"
 if not os.path.exists(CACHE_DIR):
     os.makedirs(CACHE_DIR)
+SUMMARY_CACHE_TEMPLATE = CACHE_DIR + os.sep + "{}_summary.zst"
+# Plain text summaries written before the cache was compressed; converted on first read
+LEGACY_SUMMARY_CACHE_TEMPLATE = CACHE_DIR + os.sep + "{}_summary.txt"
+# Analysis and calendar outputs; created once here instead of before every write
+ANALYSIS_DIR = "analysis"
+os.makedirs(ANALYSIS_DIR, exist_ok=True)
+# Marker files for failed scrapes; a keyword is not scraped again until its
+# marker is older than SCRAPE_FAILURE_TTL seconds
+SCRAPE_FAILURE_TEMPLATE = CACHE_DIR + os.sep + "{}_scrape_failed"
+SCRAPE_FAILURE_TTL = 15 * 60
+
+# Maximum number of keywords summarized at the same time; tune it to the
+# provider's rate limit with the SUMMARY_CONCURRENCY environment variable
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "8"))
+# Maximum number of scrapes in flight; tune it to the scrape server's capacity
+# with the SCRAPE_CONCURRENCY environment variable
+SCRAPE_CONCURRENCY = int(os.environ.get("SCRAPE_CONCURRENCY", "4"))
+
+# Payload sizes (in characters) above which the large-context model is used
+SUMMARY_LARGE_CONTEXT_CHARS = 200_000
+ANALYZE_LARGE_CONTEXT_CHARS = 100_000
+
+# Token budget for a single analyze prompt (instructions + summaries); larger
+# inputs are analyzed in parallel chunks and then merged
+ANALYZE_CHUNK_TOKENS = 120_000
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    True for failures worth retrying: rate limits and server errors from either
+    SDK (openai exposes `status_code`, google-genai `code`), dropped connections
+    and timeouts.
+    """
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, openai.APIConnectionError))
+
+# Exponential backoff with jitter for LLM calls; gives up after 5 attempts
+llm_retry = retry(
+    wait=wait_random_exponential(min=1, max=30),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception(is_transient_error),
+    reraise=True,
+)
+
+@llm_retry
+async def generate_text(llm_api, prompt: str, **kwargs):
+    return await llm_api.process_text(prompt, **kwargs)
+
+def serialize_scrape_response(scrape_response) -> str:
+    """
+    Serializes scraped data as compact JSON with sorted keys, so identical data
+    always yields the same prompt text (and the same response cache entry).
+    """
+    return orjson.dumps(scrape_response, option=orjson.OPT_SORT_KEYS).decode()
+
+def convert_legacy_summary(legacy_filename: str, cache_filename: str) -> str:
+    """
+    Copies a plain text summary into the compressed cache and returns it.
+    The .txt file is left in place.
+    """
+    with open(legacy_filename, 'r', encoding='utf-8') as legacy_file:
+        summary = legacy_file.read()
+    write_compressed(cache_filename, summary)
+    return summary
+
+def written_today(path: str) -> bool:
+    """
+    Returns True if `path` exists and was last written today.
+    """
+    try:
+        modified_at = os.path.getmtime(path)
+    except OSError:
+        return False
+    return date.fromtimestamp(modified_at) == date.today()
 
 def check_cache(keyword):
-    cache_filename = os.path.join(CACHE_DIR, f"{keyword}_summary.txt")
-    # Try to load cached response based on keyword if available
-    if os.path.exists(cache_filename):
-        with open(cache_filename, 'r', encoding='utf-8') as cache_file:
-            cached_response = cache_file.read()
-        return cached_response
-    else:
-        return None
+    """
+    Returns today's summary for `keyword`, or None. Summaries from earlier days
+    are ignored, so the keyword is scraped again and the prompt (which carries
+    today's date) goes through the response cache.
+    """
+    cache_filename = SUMMARY_CACHE_TEMPLATE.format(keyword)
+    if written_today(cache_filename):
+        return read_compressed(cache_filename)
+    legacy_filename = LEGACY_SUMMARY_CACHE_TEMPLATE.format(keyword)
+    if written_today(legacy_filename):
+        return convert_legacy_summary(legacy_filename, cache_filename)
+    return None
+
+async def acheck_cache(keyword):
+    return await asyncio.to_thread(check_cache, keyword)
 
-def call_create_summary(keyword: str, scrape_response: dict):
-    cache_filename = os.path.join(CACHE_DIR, f"{keyword}_summary.txt")
-    cached_response = check_cache(keyword)
-    if cached_response:
-        return cached_response
+def recent_scrape_failure(keyword) -> bool:
+    """
+    Returns True if scraping `keyword` failed less than SCRAPE_FAILURE_TTL seconds ago.
+    """
+    try:
+        failed_at = os.path.getmtime(SCRAPE_FAILURE_TEMPLATE.format(keyword))
+    except OSError:
+        return False
+    return time.time() - failed_at < SCRAPE_FAILURE_TTL
+
+def mark_scrape_failure(keyword):
+    write_text(SCRAPE_FAILURE_TEMPLATE.format(keyword), "")
+
+async def load_cached_summaries():
+    """
+    Reads every cached keyword summary concurrently. Plain text summaries
+    without a compressed copy are converted as they are read.
+    """
+    with os.scandir(CACHE_DIR) as entries:
+        cache_files = {entry.name: entry.path for entry in entries if entry.is_file()}
+    reads = []
+    for name, path in cache_files.items():
+        if name.endswith("_summary.zst"):
+            reads.append(asyncio.to_thread(read_compressed, path))
+        elif name.endswith("_summary.txt") and name[:-len(".txt")] + ".zst" not in cache_files:
+            reads.append(asyncio.to_thread(convert_legacy_summary, path, path[:-len(".txt")] + ".zst"))
+    return await asyncio.gather(*reads)
+
+async def acall_create_summary(keyword: str, scrape_response: dict):
+    cache_filename = SUMMARY_CACHE_TEMPLATE.format(keyword)
 
     # Get prompt instructions to combine scrape results
     instructions = combine_scrape_prompt(keyword)
-    prompt = instructions + "\n" + str(scrape_response)
-    # Process the prompt with the language model
-    response = asyncio.run(google_llm_api.process_text(prompt.strip("\n")))
+    scrape_response_str = serialize_scrape_response(scrape_response)
+    prompt = instructions + "\n" + scrape_response_str
+    # Short payloads go to the cheaper model
+    if len(scrape_response_str) > SUMMARY_LARGE_CONTEXT_CHARS:
+        llm_api = google_llm_api
+    else:
+        llm_api = google_flash_api
+    # Process the prompt with the language model, reusing the response if this
+    # exact prompt was already answered
+    response = await get_or_call(
+        prompt.strip("\n"),
+        lambda p: generate_text(llm_api, p),
+        key=keyword,
+    )
 
-    # Save the response to a file with the keyword as the filename
-    with open(cache_filename, 'w', encoding='utf-8') as cache_file:
-        cache_file.write(response)
+    # Save the response to a file with the keyword as the filename. Failed
+    # calls are not saved, so the keyword is retried on the next run.
+    if response:
+        await asyncio.to_thread(write_compressed, cache_filename, response)
 
     return response
 
-def call_analyze_data(summaries: list):
-    # Format timestamp to avoid illegal characters in filenames
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    cache_filename = os.path.join("analysis", f"analyze_{timestamp}.txt")
+async def call_create_summary_batch(keywords: list, scrape_responses: list):
+    """
+    Summarizes the scrape results of several keywords in a single OpenAI batch job.
+    Slower to complete than the online path but billed at half the price.
+    Prompts already in the response cache are not resubmitted, and batch
+    responses are added to it.
+    """
+    prompts = {}
+    for keyword, scrape_response in zip(keywords, scrape_responses):
+        instructions = combine_scrape_prompt(keyword)
+        prompts[keyword] = (instructions + "\n" + serialize_scrape_response(scrape_response)).strip("\n")
 
-    # Combine all summaries into one string
-    summaries_str = " ".join(summaries)
-    instructions = analyze_data()
+    cached_responses = await asyncio.gather(*(lookup(prompt) for prompt in prompts.values()))
+    results = {keyword: cached for keyword, cached in zip(prompts, cached_responses) if cached}
+    pending = {keyword: prompt for keyword, prompt in prompts.items() if keyword not in results}
+    if pending:
+        batch_results = await openai_llm_api.process_text_batch(pending)
+        for keyword, response in batch_results.items():
+            await store(pending[keyword], response, key=keyword)
+        results.update(batch_results)
+
+    summaries = []
+    for keyword in keywords:
+        response = results.get(keyword)
+        if response:
+            cache_filename = SUMMARY_CACHE_TEMPLATE.format(keyword)
+            await asyncio.to_thread(write_compressed, cache_filename, response)
+        summaries.append(response)
+    return summaries
+
+async def scrape_producer(keywords: list, queue: asyncio.Queue, max_inflight: int, num_consumers: int):
+    """
+    Scrapes keywords concurrently (at most `max_inflight` at once) and puts each
+    `(keyword, scrape_response)` on the queue as soon as it completes, followed
+    by one `None` sentinel per consumer.
+    """
+    semaphore = asyncio.Semaphore(max_inflight)
+
+    async def scrape(keyword):
+        if recent_scrape_failure(keyword):
+            # Failed moments ago, don't hit the scrape server again yet
+            await queue.put((keyword, None))
+            return
+        async with semaphore:
+            scrape_response = await call_scrape_api(keyword, client=client)
+        if scrape_response is None:
+            await asyncio.to_thread(mark_scrape_failure, keyword)
+        await queue.put((keyword, scrape_response))
+
+    # One client for all scrapes, so connections to the scrape server are
+    # reused. Requests to the scrape server are never timed out.
+    async with httpx.AsyncClient(timeout=None) as client:
+        await asyncio.gather(*(scrape(keyword) for keyword in keywords))
+    for _ in range(num_consumers):
+        await queue.put(None)
+
+async def summary_consumer(queue: asyncio.Queue, results: dict):
+    """
+    Summarizes scrape results from the queue until a `None` sentinel arrives.
+    """
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        keyword, scrape_response = item
+        if scrape_response is None:
+            # Scrape failed, nothing to summarize
+            results[keyword] = None
+            continue
+        try:
+            results[keyword] = await acall_create_summary(keyword, scrape_response)
+        except Exception as e:
+            # Out of retries or a permanent error (e.g. a blocked prompt); keep
+            # summarizing the other keywords
+            print(f"Error summarizing {keyword}: {e}")
+            results[keyword] = None
+
+async def summarize_keywords(
+    keywords: list,
+    max_inflight: int = SUMMARY_CONCURRENCY,
+    max_scrapes: int = SCRAPE_CONCURRENCY,
+    batch: bool = False,
+):
+    """
+    Scrapes and summarizes every keyword, returning the summaries in the same
+    order as `keywords`; repeated keywords are only processed once. Scraping and
+    summarization overlap: each keyword is summarized as soon as its scrape
+    completes, while other scrapes continue.
+    At most `max_scrapes` scrapes and `max_inflight` LLM calls run at once.
+    With `batch`, uncached keywords are summarized through the batch API instead.
+    """
+    # Market and portfolio keywords can overlap; process each one only once
+    unique_keywords = list(dict.fromkeys(keywords))
+    # Keywords summarized earlier today skip the scrape entirely
+    cached_responses = await asyncio.gather(*(acheck_cache(keyword) for keyword in unique_keywords))
+    results = {keyword: cached for keyword, cached in zip(unique_keywords, cached_responses) if cached}
+    uncached = [keyword for keyword in unique_keywords if keyword not in results]
+
+    queue = asyncio.Queue()
+    if batch:
+        await scrape_producer(uncached, queue, max_scrapes, num_consumers=0)
+        scraped = [queue.get_nowait() for _ in range(queue.qsize())]
+        scraped = [(keyword, response) for keyword, response in scraped if response is not None]
+        batch_keywords = [keyword for keyword, _ in scraped]
+        batch_summaries = await call_create_summary_batch(batch_keywords, [response for _, response in scraped])
+        results.update(zip(batch_keywords, batch_summaries))
+    else:
+        await asyncio.gather(
+            scrape_producer(uncached, queue, max_scrapes, num_consumers=max_inflight),
+            *(summary_consumer(queue, results) for _ in range(max_inflight)),
+        )
+    return [results.get(keyword) for keyword in keywords]
+
+def write_stream(filename: str, chunks: SimpleQueue):
+    """
+    Writes chunks from the queue into `filename` until a `None` sentinel arrives.
+    Blocking; runs in a worker thread next to the streaming coroutine.
+    """
+    with open(filename, 'w', encoding='utf-8') as output_file:
+        while True:
+            chunk = chunks.get()
+            # Write everything that arrived meanwhile, then flush once so
+            # readers see progress
+            while chunk is not None:
+                output_file.write(chunk)
+                try:
+                    chunk = chunks.get_nowait()
+                except Empty:
+                    break
+            output_file.flush()
+            if chunk is None:
+                return
+
+@llm_retry
+async def stream_to_file(llm_api, prompt: str, filename: str, **kwargs):
+    """
+    Streams the LLM response into `filename` as it is generated, so the file is
+    readable before the call completes, and returns the full response.
+    File writes happen in a worker thread, off the event loop.
+    A retry restarts the stream and rewrites the file from the beginning.
+    """
+    chunks = []
+    pending = SimpleQueue()
+    writer = asyncio.create_task(asyncio.to_thread(write_stream, filename, pending))
+    try:
+        async for chunk in llm_api.process_text_stream(prompt, **kwargs):
+            chunks.append(chunk)
+            pending.put(chunk)
+    finally:
+        pending.put(None)
+        await writer
+    return "".join(chunks)
+
+async def analyze_chunk(instructions: str, summaries_str: str, output_filename: str, key: str):
     prompt = instructions + "\n" + summaries_str
+    # Only use the 2M context model when the summaries need it
+    if len(summaries_str) > ANALYZE_LARGE_CONTEXT_CHARS:
+        llm_api = google_llm_api
+    else:
+        llm_api = google_flash_api
 
-    response = asyncio.run(google_llm_api.process_text(prompt, max_tokens=16384))
+    # On a cache miss the response is streamed into the output file as it arrives
+    response = await get_or_call(
+        prompt,
+        lambda p: stream_to_file(llm_api, p, output_filename, max_tokens=16384),
+        key=key,
+    )
 
-    # Save the response to a file with the timestamped filename
-    with open(cache_filename, 'w', encoding='utf-8') as cache_file:
-        cache_file.write(response)
+    # Save the response to the output file (also covers cache hits). On a miss
+    # this intentionally replaces the streamed file: the atomic rewrite leaves a
+    # complete file even if the stream was interrupted partway through.
+    await asyncio.to_thread(write_text, output_filename, response)
     return response
 
-def call_calendar(analysis:str):
-    cache_filename = os.path.join("analysis", f"{date.today()}_calendar.txt")
+def build_analyze_chunks(instructions: str, summaries: list) -> list:
+    """
+    Drops paragraphs repeated across keywords and packs the summaries into
+    chunks that fit the analyze context budget alongside the instructions.
+    Summaries stay whole and separated, so each keeps its own sections.
+    Blocking; run it through asyncio.to_thread from coroutines.
+    """
+    chunk_budget = ANALYZE_CHUNK_TOKENS - count_prompt_tokens(instructions)
+    return chunk_by_tokens(dedupe_paragraphs(summaries), chunk_budget, separator="\n---\n")
+
+async def call_analyze_data(summaries: list):
+    # Format timestamp to avoid illegal characters in filenames
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    cache_filename = os.path.join(ANALYSIS_DIR, f"analyze_{timestamp}.txt")
+
+    instructions = analyze_data()
+    # Hashing and tokenizing megabytes of summaries is CPU bound; keep it off the event loop
+    chunks = await asyncio.to_thread(build_analyze_chunks, instructions, summaries)
+    if len(chunks) <= 1:
+        return await analyze_chunk(instructions, "".join(chunks), cache_filename, "analyze")
+
+    # Map: analyze every chunk in parallel. Each partial is written to
+    # analysis/ and goes through the response cache, so a rerun after a
+    # failure does not redo the chunks that already completed.
+    partials = await asyncio.gather(*(
+        analyze_chunk(
+            instructions,
+            chunk,
+            os.path.join(ANALYSIS_DIR, f"analyze_{timestamp}_part{i}.txt"),
+            f"analyze_part{i}",
+        )
+        for i, chunk in enumerate(chunks)
+    ))
+    # Reduce: merge the partial event lists into the final analysis
+    return await analyze_chunk(analyze_reduce(), "\n\n".join(filter(None, partials)), cache_filename, "analyze")
+
+async def call_calendar(analysis:str):
+    cache_filename = os.path.join(ANALYSIS_DIR, f"{date.today()}_calendar.txt")
     # Combine the instructions and analysis in one string
     instructions = create_calendar()
     prompt = instructions + "\n" + analysis
 
-    response = asyncio.run(openai_llm_api.process_text(prompt))
-    # Save the response to a file with the timestamped filename
-    with open(cache_filename, 'w', encoding='utf-8') as cache_file:
-        cache_file.write(response)
+    # On a cache miss the response is streamed into the output file as it arrives
+    response = await get_or_call(
+        prompt,
+        lambda p: stream_to_file(openai_llm_api, p, cache_filename),
+        key="calendar",
+    )
+    # Save the response to a file with the timestamped filename (also covers
+    # cache hits). On a miss this intentionally replaces the streamed file with
+    # an atomic write of the complete response.
+    await asyncio.to_thread(write_text, cache_filename, response)
     return response
 
-if __name__ == "__main__":
+async def pipeline():
+    """
+    Runs the summarize -> analyze -> calendar stages on a single event loop, so
+    the API clients keep their connections alive across stages.
+    """
     # Get keywords
     keywords = get_keywords()
     print(keywords)
-    
+
     # # Use keywords to scrape data from web
-    # summaries = []
-    # for key in keywords:
-    #     print(key)
-    #     cached_response = check_cache(key)
-    #     if not cached_response:
-    #         scrape_response = call_scrape_api(key)
-    #         summary = call_create_summary(key, scrape_response)
-    #     else:
-    #         summary = cached_response
-    #     summaries.append(summary)
+    # summaries = await summarize_keywords(keywords)
 
     # Load cached results for example
-    summaries = []
-    for summary_path in glob.glob("cache/*.txt"):
-        with open(summary_path, "r", encoding="utf-8") as file:
-            summary = file.read()
-        summaries.append(summary)
+    summaries = await load_cached_summaries()
     # With the summaries, make another LLM call to analyze the data
-    analyze_response = call_analyze_data(summaries)
+    analyze_response = await call_analyze_data(summaries)
 
     # # Load cached analysis and create calendar
     # with open("analysis/analyze_20250220_171059.txt", "r") as f:
     #     analyze_response = f.read()
-    # calendar_response = call_calendar(analyze_response)
-    # print(calendar_response)
\ No newline at end of file
+    # calendar_response = await call_calendar(analyze_response)
+    # print(calendar_response)
+    return analyze_response
+
+if __name__ == "__main__":
+    asyncio.run(pipeline())
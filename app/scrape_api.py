@@ -1,26 +1,36 @@
-import requests
-import json
-import time
+import asyncio
+import random
+
+import httpx
 
 BASE_URL = "http://localhost:3002/api/v1/serp-scrape"
+# Status polling delay in seconds: starts short and grows up to the cap
+POLL_INITIAL_DELAY = 0.5
+POLL_MAX_DELAY = 5.0
 
 
-def call_scrape_api(
-    query, api_secret_token="default_secret_token", depth=1, clear_cache=False
+async def call_scrape_api(
+    query, api_secret_token="default_secret_token", depth=1, clear_cache=False, client=None
 ):
     """
     Test the SERP-SCRAPE endpoint and return the scraped data.
 
     Parameters:
-        base_url (str): The base URL of the API endpoint.
-        api_secret_token (str): The API secret token for authentication.
         query (str): The search query parameter.
+        api_secret_token (str): The API secret token for authentication.
         depth (int): The depth of the scrape.
         clear_cache (bool): Whether to clear cache (optional).
+        client (httpx.AsyncClient, optional): Shared client to reuse connections
+            across scrapes. A temporary one without a timeout is created if omitted.
 
     Returns:
         dict or None: The scraped data as a dictionary if successful, otherwise None.
     """
+    if client is None:
+        # Requests to the scrape server are never timed out
+        async with httpx.AsyncClient(timeout=None) as client:
+            return await call_scrape_api(query, api_secret_token, depth, clear_cache, client)
+
     headers = {
         "Authorization": f"Bearer {api_secret_token}",
         "Content-Type": "application/json",
@@ -35,33 +45,43 @@ def call_scrape_api(
         "clear_cache": clear_cache,
     }
 
-    # Make a POST request to initiate the scrape task.
-    response = requests.post(endpoint, headers=headers, json=params)
-    if response.status_code != 202:
-        print(f"Error: {response.status_code} - {response.text}")
-        return None
+    try:
+        # Make a POST request to initiate the scrape task.
+        response = await client.post(endpoint, headers=headers, json=params)
+        if response.status_code != 202:
+            print(f"Error: {response.status_code} - {response.text}")
+            return None
 
-    data = response.json()
-    task_id = data.get("task_id")
+        data = response.json()
+        task_id = data.get("task_id")
 
-    # Poll the status endpoint until the task is completed or fails.
-    status_url = f"{BASE_URL}/{task_id}/status"
-    while True:
-        status_resp = requests.get(status_url, headers=headers)
-        if status_resp.text.strip() == "":
-            print("Received an empty response")
-        else:
-            status_data = status_resp.json()
-        print("Current status:", status_data.get("status"))
-        if status_data.get("status") == "completed":
-            break
-        if status_data.get("status") == "failed":
-            print("Scrape failed with error:", status_data.get("error"))
-            return None
-        time.sleep(10)
+        # Poll the status endpoint until the task is completed or fails.
+        # Waiting does not hold a thread, so many scrapes can poll at once.
+        status_url = f"{BASE_URL}/{task_id}/status"
+        status_data = {}
+        delay = POLL_INITIAL_DELAY
+        while True:
+            status_resp = await client.get(status_url, headers=headers)
+            if status_resp.text.strip() == "":
+                print("Received an empty response")
+            else:
+                status_data = status_resp.json()
+            print("Current status:", status_data.get("status"))
+            if status_data.get("status") == "completed":
+                break
+            if status_data.get("status") == "failed":
+                print("Scrape failed with error:", status_data.get("error"))
+                return None
+            # Jitter keeps concurrent scrapes from polling in lockstep
+            await asyncio.sleep(delay + random.uniform(0, 0.25))
+            delay = min(delay * 1.5, POLL_MAX_DELAY)
 
-    # Retrieve the scraped data from the completed task.
-    data_url = f"{BASE_URL}/{task_id}/data"
-    data_resp = requests.get(data_url, headers=headers)
-    scraped_data = data_resp.json()
-    return scraped_data
+        # Retrieve the scraped data from the completed task.
+        data_url = f"{BASE_URL}/{task_id}/data"
+        data_resp = await client.get(data_url, headers=headers)
+        scraped_data = data_resp.json()
+        return scraped_data
+    except (httpx.HTTPError, ValueError) as e:
+        # Connection errors, HTTP errors and invalid JSON responses
+        print(f"Error scraping {query}: {e}")
+        return None
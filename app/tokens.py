@@ -0,0 +1,74 @@
+# tokens.py
+"""
+Token counting and token-budget chunking for large LLM inputs.
+
+Counts use the GPT-4o tokenizer; for other providers they are a close estimate,
+which is all the chunk budget needs. tiktoken downloads the encoding on first
+use; when that fails (e.g. offline), counts fall back to ~4 characters per token.
+"""
+from functools import lru_cache
+from typing import Iterable, List
+
+import tiktoken
+
+
+# Rough characters per token, used when the tokenizer is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        print(f"Warning: Could not load the tiktoken encoding, estimating token counts. Error: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Returns the number of tokens in `text`, or an estimate if the tokenizer
+    could not be loaded.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+@lru_cache(maxsize=16)
+def count_prompt_tokens(instructions: str) -> int:
+    """
+    Returns the number of tokens in a static instruction prompt. Memoized: the
+    rendered templates only change once per day, so each is encoded once.
+    """
+    return count_tokens(instructions)
+
+
+def chunk_by_tokens(texts: Iterable[str], max_tokens: int, separator: str = "\n\n") -> List[str]:
+    """
+    Greedily packs texts, in order, into chunks of at most `max_tokens`
+    tokens. A single text larger than the budget becomes its own chunk.
+
+    Args:
+        texts (Iterable[str]): The texts to pack (e.g. paragraphs or summaries).
+        max_tokens (int): Token budget per chunk.
+        separator (str): String placed between texts within a chunk.
+
+    Returns:
+        List[str]: The chunks.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        text_tokens = count_tokens(text)
+        if current and current_tokens + text_tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += text_tokens
+    if current:
+        chunks.append(separator.join(current))
+    return chunks